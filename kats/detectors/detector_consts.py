@@ -7,9 +7,12 @@
 
 from __future__ import annotations
 
+import logging
+import math
 from dataclasses import dataclass
 from datetime import datetime
-from typing import cast, List, Optional, Tuple, Union
+from functools import lru_cache
+from typing import cast, Dict, List, Optional, Tuple, Union
 
 import attr
 import numpy as np
@@ -19,11 +22,103 @@ from kats.consts import TimeSeriesData
 from scipy.stats import norm, t, ttest_ind  # @manual
 from statsmodels.stats import multitest
 
+try:
+    from scipy.stats import false_discovery_control  # @manual
+except ImportError:
+    # added in scipy 1.11, older versions go through statsmodels
+    false_discovery_control = None
+
+# statsmodels multipletests methods that scipy's false_discovery_control also implements
+_SCIPY_FDR_METHODS = {"fdr_bh": "bh", "fdr_by": "by"}
+
+try:
+    import llvmlite  # @manual
+    import numba  # @manual
+
+    # same guard as kats.tsfeatures: with this combination the import
+    # succeeds but the jitted function fails when used
+    if numba.__version__ == "0.55.0" and llvmlite.__version__ == "0.42.0":
+        raise ImportError("Incompatible Numba and LLVMlite versions")
+
+    from numba import jit  # @manual
+
+except ImportError:
+    logging.warning("numba is not installed. jit compilation of t-test is disabled")
+
+    def jit(**kwargs):  # type: ignore
+        def jit_decorator(func):  # type: ignore
+            return func
+
+        return jit_decorator
+
+
 # from np.typing import ArrayLike
 # pyre-fixme[24]: Generic type `np.ndarray` expects 2 type parameters.
 ArrayLike = np.ndarray
 
 
+@jit(nopython=True, cache=True)
+def _pooled_t(
+    n_1: int,
+    n_2: int,
+    s_1_sq: float,
+    s_2_sq: float,
+    mean_1: float,
+    mean_2: float,
+    corrected: bool,
+) -> Tuple[float, float]:
+    """
+    Scalar kernel returning the pooled standard deviation and the t-score of
+    mean_2 against mean_1. A zero pooled standard deviation gives the same
+    inf/nan t-score as numpy division would.
+    """
+    # Require both populations to be nonempty, and their sum larger than 2, because the
+    # t-test has (n_1 + n_2 - 2) degrees of freedom.
+    if n_1 == 0 or n_2 == 0 or (n_1 == 1 and n_2 == 1):
+        s_p = 0.0
+    else:
+        s_p = math.sqrt(((n_1 - 1) * s_1_sq + (n_2 - 1) * s_2_sq) / (n_1 + n_2 - 2))
+        if corrected:
+            # based on the definition of t-test, we should return s_p_mean
+            s_p *= math.sqrt((1.0 / n_1) + (1.0 / n_2))
+
+    diff = mean_2 - mean_1
+    if s_p != 0.0:
+        t_score = diff / s_p
+    elif diff == 0.0 or diff != diff:
+        t_score = math.nan
+    else:
+        t_score = math.inf if diff > 0.0 else -math.inf
+    return s_p, t_score
+
+
+# the quantiles only depend on alpha (and the degrees of freedom for t), so
+# memoize them instead of going through scipy's ppf on every call
+@lru_cache(None)
+def _norm_ppf(q: float) -> float:
+    return norm.ppf(q)
+
+
+@lru_cache(maxsize=1024)
+def _t_ppf(q: float, df: float) -> float:
+    return t.ppf(q, df)
+
+
+def _time_array(data: TimeSeriesData) -> Tuple[ArrayLike, bool]:
+    """
+    returns the times of data as an array, and whether they are in ascending order.
+    """
+    time = data.time
+    if pd.api.types.is_datetime64_dtype(time):
+        times = time.to_numpy()
+    else:
+        times = pd.to_datetime(time).to_numpy()
+    # sort_by_time only reflects how data was constructed, the times can be
+    # reordered afterwards (e.g. by extend(validate=False)), so always check
+    is_sorted = bool(np.all(times[1:] >= times[:-1]))
+    return times, is_sorted
+
+
 # Single Spike object
 @attr.s(auto_attribs=True)
 class SingleSpike:
@@ -46,87 +141,148 @@ class ChangePointInterval:
         Optional[List[SingleSpike]], Optional[List[List[SingleSpike]]]
     ] = attr.ib(default=None, init=False)
     spike_std_threshold: float = attr.ib(default=2.0, init=False)
-    data_df: Optional[pd.DataFrame] = attr.ib(None, init=False)
     _ts_cols: List[str] = attr.ib(factory=lambda: ["value"], init=False)
     num_series: int = 1
+    # the windowed data is stored as a time array and a (length, num_series) value array
+    _times: Optional[ArrayLike] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+    _values: Optional[ArrayLike] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+    # whether _times is in ascending order, so windows can be found by bisection
+    _is_sorted: bool = attr.ib(default=True, init=False, eq=False, repr=False)
+    # lazily computed statistics, reset whenever the data changes
+    _mean_cache: Optional[Union[float, ArrayLike]] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+    _var_cache: Optional[Union[float, ArrayLike]] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
+    _std_cache: Optional[Union[float, ArrayLike]] = attr.ib(
+        default=None, init=False, eq=False, repr=False
+    )
 
     @property
     def data(self) -> Optional[ArrayLike]:
-        df = self.data_df
-        if df is None:
+        values = self._values
+        if values is None:
             return None
         elif self.num_series == 1:
-            return df.value.values
+            return values[:, 0]
         else:
-            return df[self._ts_cols].values
+            return values
 
     @data.setter
     def data(self, data: TimeSeriesData) -> None:
         if not data.is_univariate():
             self._ts_cols = list(data.value.columns)
             self.num_series = len(self._ts_cols)
-        all_data_df = data.to_dataframe()
-        all_data_df.columns = ["time"] + self._ts_cols
-        all_data_df["time"] = pd.to_datetime(all_data_df["time"])
-        all_data_df = all_data_df.loc[
-            (all_data_df.time >= self.start_time) & (all_data_df.time < self.end_time)
-        ]
-        self.data_df = all_data_df
+        self._set_arrays(*self._windowed(data))
+
+    @property
+    def data_df(self) -> Optional[pd.DataFrame]:
+        """
+        the windowed data as a DataFrame, built on demand from the stored arrays.
+        """
+        times, values = self._times, self._values
+        if times is None or values is None:
+            return None
+        df = pd.DataFrame(values, columns=self._ts_cols, copy=False)
+        df.insert(0, "time", times)
+        return df
+
+    def _windowed(self, data: TimeSeriesData) -> Tuple[ArrayLike, ArrayLike, bool]:
+        """
+        returns the times and values of data within the interval, and whether the
+        times are in ascending order.
+        """
+        times, is_sorted = _time_array(data)
+        values = data.value.to_numpy().reshape(len(times), self.num_series)
+        window = self._window(times, is_sorted)
+        if isinstance(window, slice):
+            # slicing returns views of data, which may be modified after it's set
+            return times[window].copy(), values[window].copy(order="K"), is_sorted
+        return times[window], values[window], is_sorted
+
+    def _window(self, times: ArrayLike, is_sorted: bool) -> Union[slice, ArrayLike]:
+        """
+        returns an index selecting the times within [start_time, end_time).
+        """
+        bounds = np.array([self.start_time, self.end_time], dtype=times.dtype)
+        if is_sorted:
+            lo, hi = np.searchsorted(times, bounds)
+            return slice(lo, hi)
+        return (times >= bounds[0]) & (times < bounds[1])
+
+    def _set_arrays(self, times: ArrayLike, values: ArrayLike, is_sorted: bool) -> None:
+        """
+        stores the windowed data and resets cached statistics.
+        """
+        self._times = times
+        self._values = values
+        self._is_sorted = is_sorted
+        self._mean_cache = None
+        self._var_cache = None
+        self._std_cache = None
 
     def _detect_spikes(self) -> Union[List[SingleSpike], List[List[SingleSpike]]]:
-        df = self.data_df
-        if df is None:
+        times, arr = self._times, self._values
+        if times is None or arr is None:
             raise ValueError("data must be set before spike detection")
 
         if self.num_series == 1:
-            df["z_score"] = (df.value - self.mean_val) / np.sqrt(self.variance_val)
-
-            spike_df = df.query(f"z_score >={self.spike_std_threshold}")
+            vals = arr[:, 0]
+            z_scores = (vals - self.mean_val) / self.std_val
+            mask = z_scores >= self.spike_std_threshold
             return [
-                SingleSpike(
-                    time=row["time"], value=row["value"], n_sigma=row["z_score"]
-                )
-                for counter, row in spike_df.iterrows()
+                SingleSpike(time=pd.Timestamp(t), value=v, n_sigma=z)
+                for t, v, z in zip(times[mask], vals[mask], z_scores[mask])
             ]
         else:
-            spikes = []
-            for i, c in enumerate(self._ts_cols):
-                mean_val, variance_val = self.mean_val, self.variance_val
-                if isinstance(mean_val, float) or isinstance(variance_val, float):
-                    raise ValueError(
-                        f"num_series = {self.num_series} so mean_val and variance_val should have type ArrayLike."
-                    )
-                df[f"z_score_{c}"] = (df[c] - mean_val[i]) / np.sqrt(variance_val[i])
-
-                spike_df = df.query(f"z_score_{c} >={self.spike_std_threshold}")
+            mean_val, std_val = self.mean_val, self.std_val
+            if isinstance(mean_val, float) or isinstance(std_val, float):
+                raise ValueError(
+                    f"num_series = {self.num_series} so mean_val and std_val should have type ArrayLike."
+                )
+            z_scores = (arr - mean_val) / std_val
+            masks = z_scores >= self.spike_std_threshold
 
-                if spike_df.shape[0] == 0:
+            spikes = []
+            for i in range(self.num_series):
+                mask = masks[:, i]
+                if not mask.any():
                     continue
-                else:
-                    spikes.append(
-                        [
-                            SingleSpike(
-                                time=row["time"],
-                                value=row[c],
-                                n_sigma=row[f"z_score_{c}"],
-                            )
-                            for counter, row in spike_df.iterrows()
-                        ]
-                    )
+                spikes.append(
+                    [
+                        SingleSpike(time=pd.Timestamp(t), value=v, n_sigma=z)
+                        for t, v, z in zip(times[mask], arr[mask, i], z_scores[mask, i])
+                    ]
+                )
             return spikes
 
     def extend_data(self, data: TimeSeriesData) -> None:
         """
         extends the data.
         """
-        new_data_df = data.to_dataframe()
-        new_data_df.columns = ["time"] + self._ts_cols
-        df = self.data_df
-        if df is not None:
-            new_data_df = pd.concat([df, new_data_df], copy=False)
-        self.data_df = new_data_df.loc[
-            (new_data_df.time >= self.start_time) & (new_data_df.time < self.end_time)
-        ]
+        times, values, is_sorted = self._windowed(data)
+
+        old_times, old_values = self._times, self._values
+        if old_times is not None and old_values is not None:
+            # the window may have moved since the data was set, so trim the
+            # stored points before appending instead of re-filtering the whole history
+            keep = self._window(old_times, self._is_sorted)
+            old_times, old_values = old_times[keep], old_values[keep]
+            is_sorted = (
+                is_sorted
+                and self._is_sorted
+                and (
+                    len(old_times) == 0 or len(times) == 0 or old_times[-1] <= times[0]
+                )
+            )
+            times = np.concatenate([old_times, times])
+            values = np.concatenate([old_values, values])
+        self._set_arrays(times, values, is_sorted)
 
     @property
     def start_time_str(self) -> str:
@@ -138,31 +294,44 @@ class ChangePointInterval:
 
     @property
     def mean_val(self) -> Union[float, ArrayLike]:
-        if self.num_series == 1:
-            vals = self.data
-            return 0.0 if vals is None else np.mean(vals)
-        else:
-            data_df = self.data_df
-            if data_df is None:
-                return np.zeros(self.num_series)
-            return np.array([np.mean(data_df[c].values) for c in self._ts_cols])
+        mean_val = self._mean_cache
+        if mean_val is None:
+            arr = self._values
+            if arr is None:
+                mean_val = 0.0 if self.num_series == 1 else np.zeros(self.num_series)
+            else:
+                mean_val = np.mean(arr, axis=0)
+                if self.num_series == 1:
+                    mean_val = mean_val[0]
+            self._mean_cache = mean_val
+        return mean_val
 
     @property
     def variance_val(self) -> Union[float, ArrayLike]:
-        if self.num_series == 1:
-            vals = self.data
-            # the t-test uses the sample standard deviation^2 instead of variance,
-            return 0.0 if vals is None or len(vals) == 1 else np.var(vals, ddof=1)
-        else:
-            data_df = self.data_df
-            if data_df is None or len(data_df) == 1:
-                return np.zeros(self.num_series)
-            # the t-test uses the sample standard deviation^2 instead of variance,
-            return np.array([np.var(data_df[c].values, ddof=1) for c in self._ts_cols])
+        var_val = self._var_cache
+        if var_val is None:
+            arr = self._values
+            if arr is None or len(arr) == 1:
+                var_val = 0.0 if self.num_series == 1 else np.zeros(self.num_series)
+            else:
+                # the t-test uses the sample standard deviation^2 instead of variance,
+                var_val = np.var(arr, axis=0, ddof=1)
+                if self.num_series == 1:
+                    var_val = var_val[0]
+            self._var_cache = var_val
+        return var_val
+
+    @property
+    def std_val(self) -> Union[float, ArrayLike]:
+        std_val = self._std_cache
+        if std_val is None:
+            std_val = np.sqrt(self.variance_val)
+            self._std_cache = std_val
+        return std_val
 
     def __len__(self) -> int:
-        df = self.data_df
-        return 0 if df is None else len(df)
+        arr = self._values
+        return 0 if arr is None else arr.shape[0]
 
     @property
     def spikes(self) -> Union[List[SingleSpike], List[List[SingleSpike]]]:
@@ -229,6 +398,13 @@ class PercentageChange:
         self.use_corrected_scores = use_corrected_scores
         self.min_perc_change = min_perc_change
 
+    @property
+    def _degenerate(self) -> bool:
+        # with an empty interval every statistic is undefined, so the tests
+        # short-circuit to nan instead of running on empty data. The data can be
+        # set after construction, so this is checked whenever it's needed.
+        return len(self.current) == 0 or len(self.previous) == 0
+
     @property
     def ratio_estimate(self) -> Union[float, npt.NDArray]:
         # pyre-ignore[6]: Expected float for 1st positional only parameter to call float.__truediv__ but got Union[float, np.ndarray].
@@ -261,7 +437,7 @@ class PercentageChange:
     @property
     def direction(self) -> Union[str, ArrayLike]:
         if self.num_series > 1:
-            return np.vectorize(lambda x: "up" if x > 0 else "down")(self.perc_change)
+            return np.where(np.asarray(self.perc_change) > 0.0, "up", "down")
         elif self.perc_change > 0.0:
             return "up"
         else:
@@ -269,24 +445,15 @@ class PercentageChange:
 
     @property
     def stat_sig(self) -> Union[bool, ArrayLike]:
+        if self._degenerate:
+            # nan bounds never exclude 1
+            return True if self.num_series == 1 else np.ones(self.num_series, bool)
         if self.upper is None:
             self._delta_method()
         if self.num_series > 1:
-            return np.array(
-                [
-                    (
-                        False
-                        # pyre-fixme[24]: Generic type `np.ndarray` expects 2 type
-                        #  parameters.
-                        if cast(np.ndarray, self.upper)[i] > 1.0
-                        # pyre-fixme[24]: Generic type `np.ndarray` expects 2 type
-                        #  parameters.
-                        and cast(np.ndarray, self.lower)[i] < 1
-                        else True
-                    )
-                    for i in range(self.current.num_series)
-                ]
-            )
+            upper = np.asarray(self.upper)
+            lower = np.asarray(self.lower)
+            return ~((upper > 1.0) & (lower < 1.0))
         # not stat sig e.g. [0.88, 1.55]
         return not (
             # pyre-fixme[24]: Generic type `np.ndarray` expects 2 type parameters.
@@ -302,13 +469,22 @@ class PercentageChange:
 
         t_score = self._t_score
 
+        # the score is already nan when degenerate, and an absolute value is
+        # never below a non-positive threshold, so the t-score stands as is
+        if self._degenerate or self.min_perc_change <= 0.0:
+            if self.num_series > 1:
+                # don't hand out the cached array
+                return cast(float, np.array(t_score, copy=True))
+            return cast(float, t_score)
+
+        perc_change = self.perc_change
         if self.num_series == 1:
-            if np.abs(self.perc_change) < self.min_perc_change:
+            if abs(perc_change) < self.min_perc_change:
                 t_score = 0.0
         else:
             t_score = np.where(
                 # pyre-fixme[6]: For 3rd argument expected `Union[_SupportsArray[dtyp...
-                np.abs(self.perc_change) < self.min_perc_change,
+                np.abs(perc_change) < self.min_perc_change,
                 0,
                 # pyre-fixme[6]: For 3rd argument expected `Union[_SupportsArray[dtyp...
                 t_score,
@@ -340,7 +516,7 @@ class PercentageChange:
 
         # the minus sign here is non intuitive.
         # this is because, for example, t.ppf(0.025, 30) ~ -1.96
-        _ci_upper = self.previous.mean_val - t.ppf(self.alpha / 2, df) * sp_mean
+        _ci_upper = self.previous.mean_val - _t_ppf(self.alpha / 2, df) * sp_mean
 
         # pyre-fixme[7]: Expected `float` but got `Union[ndarray[Any, dtype[Any]],
         #  float]`.
@@ -352,7 +528,7 @@ class PercentageChange:
         df = self._get_df()
         # the plus sign here is non-intuitive. See comment
         # above
-        _ci_lower = self.previous.mean_val + t.ppf(self.alpha / 2, df) * sp_mean
+        _ci_lower = self.previous.mean_val + _t_ppf(self.alpha / 2, df) * sp_mean
 
         # pyre-fixme[7]: Expected `float` but got `Union[ndarray[Any, dtype[Any]],
         #  float]`.
@@ -379,6 +555,18 @@ class PercentageChange:
         n_1 = len(self.previous)
         n_2 = len(self.current)
 
+        if self.num_series == 1:
+            s_p, _ = _pooled_t(
+                n_1,
+                n_2,
+                s_1_sq,
+                s_2_sq,
+                self.previous.mean_val,
+                self.current.mean_val,
+                self.use_corrected_scores,
+            )
+            return s_p
+
         # Require both populations to be nonempty, and their sum larger than 2, because the
         # t-test has (n_1 + n_2 - 2) degrees of freedom.
         if n_1 == 0 or n_2 == 0 or (n_1 == n_2 == 1):
@@ -402,16 +590,35 @@ class PercentageChange:
         >>> ttest_ind(np.array([1,2,3,4]), np.array([11]), equal_var=True, nan_policy='omit')
         This is implemented to fix this issue
         """
-        sp_mean = self._pooled_stddev()
         df = self._get_df()
 
-        # pyre-ignore[6]: Expected float for 1st positional only parameter to call float.__sub__ but got Union[float, np.ndarray].
-        t_score = (self.current.mean_val - self.previous.mean_val) / sp_mean
+        if self.num_series == 1:
+            _, t_score = _pooled_t(
+                len(self.previous),
+                len(self.current),
+                self.previous.variance_val,
+                self.current.variance_val,
+                self.previous.mean_val,
+                self.current.mean_val,
+                self.use_corrected_scores,
+            )
+        else:
+            sp_mean = self._pooled_stddev()
+            # pyre-ignore[6]: Expected float for 1st positional only parameter to call float.__sub__ but got Union[float, np.ndarray].
+            t_score = (self.current.mean_val - self.previous.mean_val) / sp_mean
         p_value = t.sf(np.abs(t_score), df) * 2  # sf = 1 - cdf
 
         return t_score, p_value
 
+    def _nan(self) -> Union[float, npt.NDArray]:
+        return np.nan if self.num_series == 1 else np.full(self.num_series, np.nan)
+
     def _ttest(self) -> None:
+        if self._degenerate:
+            self._t_score = self._nan()
+            self._p_value = self._nan()
+            return
+
         if self.num_series > 1:
             self._ttest_multivariate()
             return
@@ -441,14 +648,11 @@ class PercentageChange:
 
     def _ttest_multivariate(self) -> None:
         num_series = self.num_series
-        p_value_start = np.zeros(num_series)
-        t_value_start = np.zeros(num_series)
-
         n_1 = len(self.previous)
         n_2 = len(self.current)
 
         if n_1 == 1 and n_2 == 1:
-            self._t_score = np.inf * np.ones(num_series)
+            self._t_score = np.full(num_series, np.inf)
             self._p_value = np.zeros(num_series)
             return
         elif n_1 == 1 or n_2 == 1:
@@ -458,12 +662,9 @@ class PercentageChange:
             prev_data = self.previous.data
             if current_data is None or prev_data is None:
                 raise ValueError("Interval data not set")
-            for i in range(num_series):
-                current_slice = current_data[:, i]
-                prev_slice = prev_data[:, i]
-                t_value_start[i], p_value_start[i] = ttest_ind(
-                    current_slice, prev_slice, equal_var=True, nan_policy="omit"
-                )
+            t_value_start, p_value_start = ttest_ind(
+                current_data, prev_data, axis=0, equal_var=True, nan_policy="omit"
+            )
 
         # if un-scaled t_score and p_value are needed
         if self.skip_rescaling:
@@ -472,23 +673,25 @@ class PercentageChange:
             return
 
         # The new p-values are the old p-values rescaled so that self.alpha is still the threshold for rejection
-        _, self._p_value, _, _ = multitest.multipletests(
-            p_value_start, alpha=self.alpha, method=self.method
-        )
-        self._t_score = np.zeros(num_series)
+        fdr_method = _SCIPY_FDR_METHODS.get(self.method)
+        if (
+            false_discovery_control is not None
+            and fdr_method is not None
+            and not np.isnan(p_value_start).any()
+        ):
+            # scipy's BH/BY adjustment only computes the adjusted p-values we need
+            self._p_value = false_discovery_control(p_value_start, method=fdr_method)
+        else:
+            _, self._p_value, _, _ = multitest.multipletests(
+                p_value_start, alpha=self.alpha, method=self.method
+            )
         # We are using a two-sided test here, so we take inverse_tcdf(self._p_value / 2) with df = len(self.current) + len(self.previous) - 2
-
-        _t_score: npt.NDArray = self._t_score
         # pyre-fixme[24]: Generic type `np.ndarray` expects 2 type parameters.
         _p_value: npt.NDArray = cast(np.ndarray, self._p_value)
-        for i in range(self.current.num_series):
-            # pyre-fixme[16]: Item `float` of `ndarray[Any, dtype[Any]] | float` has
-            #  no attribute `__getitem__`.
-            if t_value_start[i] < 0:
-                _t_score[i] = t.ppf(_p_value[i] / 2, self._get_df())
-            else:
-                _t_score[i] = t.ppf(1 - _p_value[i] / 2, self._get_df())
-        self._t_score = _t_score
+        quantiles = np.where(
+            np.asarray(t_value_start) < 0, _p_value / 2, 1 - _p_value / 2
+        )
+        self._t_score = t.ppf(quantiles, self._get_df())
 
     def _calc_cov(self) -> float:
         """
@@ -507,17 +710,21 @@ class PercentageChange:
 
         # for multivariate TS data
         if self.num_series > 1:
+            # sample covariance of each column pair, computed for all series at once
+            cov = (
+                (current - current.mean(axis=0)) * (previous - previous.mean(axis=0))
+            ).sum(axis=0) / (n_min - 1)
             # pyre-fixme[7]: Expected `float` but got `ndarray[Any, dtype[Any]]`.
-            return np.asarray(
-                [
-                    np.cov(current[:, c], previous[:, c])[0, 1] / n_min
-                    for c in range(self.num_series)
-                ]
-            )
+            return cov / n_min
 
         return np.cov(current, previous)[0, 1] / n_min
 
     def _delta_method(self) -> None:
+        if self._degenerate:
+            self.lower = self._nan()
+            self.upper = self._nan()
+            return
+
         test_mean = self.current.mean_val
         control_mean = self.previous.mean_val
         test_var = self.current.variance_val
@@ -528,28 +735,26 @@ class PercentageChange:
 
         cov_xy = self._calc_cov()
 
+        # powers of the means are shared between the terms, so compute them once
+        control_mean_sq = control_mean * control_mean
+        control_mean_cu = control_mean_sq * control_mean
+        control_mean_qu = control_mean_sq * control_mean_sq
+        test_mean_sq = test_mean * test_mean
+
         sigma_sq_ratio = (
             # pyre-fixme[58]: `*` is not supported for operand types `int` and
             #  `Union[ndarray[Any, dtype[Any]], float]`.
-            test_var / (n_test * (control_mean**2))
-            # pyre-fixme[58]: `*` is not supported for operand types `int` and
-            #  `Union[ndarray[Any, dtype[Any]], float]`.
-            # pyre-fixme[58]: `/` is not supported for operand types `int` and
-            #  `Union[ndarray[Any, dtype[Any]], float]`.
-            - 2 * (test_mean * cov_xy) / (control_mean**3)
-            # pyre-fixme[6]: For 1st argument expected `float` but got
-            #  `Union[ndarray[Any, dtype[Any]], float]`.
+            test_var / (n_test * control_mean_sq)
+            - 2 * (test_mean * cov_xy) / control_mean_cu
             # pyre-fixme[58]: `*` is not supported for operand types `int` and
             #  `Union[ndarray[Any, dtype[Any]], float]`.
-            + (control_var * (test_mean**2)) / (n_control * (control_mean**4))
+            + (control_var * test_mean_sq) / (n_control * control_mean_qu)
         )
+        ratio = self.ratio_estimate
         # the signs appear flipped because norm.ppf(0.025) ~ -1.96
-        self.lower = self.ratio_estimate + norm.ppf(self.alpha / 2) * np.sqrt(
-            abs(sigma_sq_ratio)
-        )
-        self.upper = self.ratio_estimate - norm.ppf(self.alpha / 2) * np.sqrt(
-            abs(sigma_sq_ratio)
-        )
+        half_width = _norm_ppf(self.alpha / 2) * np.sqrt(np.abs(sigma_sq_ratio))
+        self.lower = ratio + half_width
+        self.upper = ratio - half_width
 
 
 @dataclass
@@ -561,6 +766,8 @@ class ConfidenceBand:
 class AnomalyResponse:
     key_mapping: List[str]
     num_series: int
+    _time_index: Optional[Dict[datetime, int]]
+    _time_index_src: Optional[pd.Series]
 
     def __init__(
         self,
@@ -578,6 +785,10 @@ class AnomalyResponse:
 
         self.key_mapping = []
         self.num_series = 1
+        # maps each timestamp to its row, built lazily by inplace_update from
+        # the time series in _time_index_src
+        self._time_index = None
+        self._time_index_src = None
 
         if not self.scores.is_univariate():
             self.num_series = len(scores.value.columns)
@@ -596,21 +807,38 @@ class AnomalyResponse:
         """
         Add one more point and remove the last point
         """
-        self.scores = self._update_ts_slice(self.scores, time, score)
         confidence_band = self.confidence_band
+        predicted_ts = self.predicted_ts
+        stat_sig_ts = self.stat_sig_ts
+        if self.num_series > 1:
+            # check every value before shifting anything, so a bad value
+            # doesn't leave the components with different lengths
+            values = [score, anom_mag]
+            if confidence_band is not None:
+                values += [ci_upper, ci_lower]
+            if predicted_ts is not None:
+                values.append(pred)
+            if stat_sig_ts is not None:
+                values.append(stat_sig)
+            for value in values:
+                if np.shape(value) != (self.num_series,):
+                    raise ValueError(
+                        f"num_series = {self.num_series} so value should have type "
+                        f"ArrayLike with {self.num_series} elements."
+                    )
+
+        self.scores = self._update_ts_slice(self.scores, time, score)
         if confidence_band is not None:
             self.confidence_band = ConfidenceBand(
                 lower=self._update_ts_slice(confidence_band.lower, time, ci_lower),
                 upper=self._update_ts_slice(confidence_band.upper, time, ci_upper),
             )
 
-        predicted_ts = self.predicted_ts
         if predicted_ts is not None:
             self.predicted_ts = self._update_ts_slice(predicted_ts, time, pred)
         self.anomaly_magnitude_ts = self._update_ts_slice(
             self.anomaly_magnitude_ts, time, anom_mag
         )
-        stat_sig_ts = self.stat_sig_ts
         if stat_sig_ts is not None:
             self.stat_sig_ts = self._update_ts_slice(stat_sig_ts, time, stat_sig)
 
@@ -626,28 +854,16 @@ class AnomalyResponse:
             #  Series]` but got `DataFrame`.
             return TimeSeriesData(time=time_df, value=value_df)
         else:
-            if isinstance(value, float):
-                raise ValueError(
-                    f"num_series = {self.num_series} so value should have type ArrayLike."
-                )
-            value_dict = {}
-            for i, value_col in enumerate(self.key_mapping):
-                value_dict[value_col] = pd.concat(
-                    [ts.value[value_col].iloc[1:], pd.Series(value[i], copy=False)]
-                )
-                value_dict[value_col].reset_index(drop=True, inplace=True)
-            return TimeSeriesData(
-                pd.DataFrame(
-                    {
-                        **{"time": time_df},
-                        **{
-                            value_col: value_dict[value_col]
-                            for value_col in self.key_mapping
-                        },
-                    },
-                    copy=False,
-                )
+            # shift all the value columns at once as a single 2-D array
+            value_arr = np.concatenate(
+                [
+                    ts.value[self.key_mapping].to_numpy(dtype=float)[1:],
+                    np.asarray(value, dtype=float).reshape(1, -1),
+                ]
             )
+            value_df = pd.DataFrame(value_arr, columns=self.key_mapping, copy=False)
+            value_df.insert(0, "time", time_df)
+            return TimeSeriesData(value_df)
 
     def inplace_update(
         self,
@@ -682,10 +898,37 @@ class AnomalyResponse:
     ) -> None:
         if ts is None:
             return
-        if self.num_series == 1:
-            ts.value.loc[ts.time == time] = value
+        i = self._row_index(ts, time)
+        if i is None:
+            # timestamp missing or not unique, fall back to matching every row
+            if self.num_series == 1:
+                ts.value.loc[ts.time == time] = value
+            else:
+                ts.value.loc[ts.time == time, :] = np.array(value, dtype=float)
+        elif self.num_series == 1:
+            ts.value.iat[i] = value
         else:
-            ts.value.loc[ts.time == time, :] = np.array(value, dtype=float)
+            ts.value.iloc[i, :] = np.array(value, dtype=float)
+
+    def _row_index(self, ts: TimeSeriesData, time: datetime) -> Optional[int]:
+        """
+        returns the position of time in ts, or None if it can't be found by lookup.
+        """
+        # update(), extend() and assigning scores all replace the time series,
+        # so the map is rebuilt whenever it was built from a different one
+        scores_time = self.scores.time
+        time_index = self._time_index
+        if time_index is None or self._time_index_src is not scores_time:
+            time_index = {t: i for i, t in enumerate(scores_time)}
+            if len(time_index) != len(scores_time):
+                # duplicated timestamps can't be resolved to a single row
+                time_index = {}
+            self._time_index = time_index
+            self._time_index_src = scores_time
+        i = time_index.get(time)
+        if i is None or i >= len(ts) or ts.time.iat[i] != time:
+            return None
+        return i
 
     def get_last_n(self, N: int) -> AnomalyResponse:
         """
@@ -62,6 +62,7 @@ class UnivariateChangePointIntervalTest(TestCase):
         )
         self.current_mean = np.mean(current_values)
         self.current_variance = np.var(current_values, ddof=1)
+        self.current_std = np.std(current_values, ddof=1)
 
         previous_extend = TimeSeriesData(
             pd.DataFrame(
@@ -116,6 +117,7 @@ class UnivariateChangePointIntervalTest(TestCase):
             ["end_time_str", "current_end_time_str"],
             ["mean_val", "current_mean"],
             ["variance_val", "current_variance"],
+            ["std_val", "current_std"],
             ["previous_interval", "previous_int"],
         ]
     )
@@ -138,6 +140,90 @@ class UnivariateChangePointIntervalTest(TestCase):
             self.current_start_time_str,
         )
 
+    def test_stats_refresh_after_extend(self) -> None:
+        # cached mean/variance must be recomputed once the data is extended
+        interval = self.previous_int_test
+        self.assertAlmostEqual(interval.mean_val, np.mean(self.previous_values[:9]))
+        interval.end_time = self.previous_seq[-1] + timedelta(days=1)
+        interval.extend_data(
+            TimeSeriesData(
+                pd.DataFrame(
+                    {"time": self.previous_seq[9:], "value": self.previous_values[9:]}
+                )
+            )
+        )
+        self.assertEqual(len(interval), len(self.previous_seq))
+        self.assertAlmostEqual(interval.mean_val, np.mean(self.previous_values))
+        self.assertAlmostEqual(
+            interval.variance_val, np.var(self.previous_values, ddof=1)
+        )
+
+    def test_unsorted_data(self) -> None:
+        # data that isn't sorted by time must still be clipped to start and end dates
+        interval = ChangePointInterval(self.previous_seq[0], self.previous_seq[9])
+        interval.data = TimeSeriesData(
+            pd.DataFrame(
+                {
+                    "time": self.previous_seq[::-1],
+                    "value": self.previous_values[::-1],
+                }
+            ),
+            sort_by_time=False,
+        )
+        np.testing.assert_array_equal(
+            np.sort(cast(np.ndarray, interval.data)),
+            np.sort(self.previous_values[0:9]),
+        )
+
+    def test_out_of_order_extended_data(self) -> None:
+        # extend(validate=False) doesn't re-sort, even though sort_by_time is still set
+        ts = TimeSeriesData(
+            pd.DataFrame(
+                {"time": self.previous_seq[:3], "value": self.previous_values[:3]}
+            )
+        )
+        ts.extend(
+            TimeSeriesData(
+                pd.DataFrame(
+                    {"time": self.previous_seq[9:], "value": self.previous_values[9:]}
+                )
+            ),
+            validate=False,
+        )
+        ts.extend(
+            TimeSeriesData(
+                pd.DataFrame(
+                    {
+                        "time": self.previous_seq[3:9],
+                        "value": self.previous_values[3:9],
+                    }
+                )
+            ),
+            validate=False,
+        )
+        interval = ChangePointInterval(self.previous_seq[2], self.previous_seq[7])
+        interval.data = ts
+        np.testing.assert_array_equal(
+            np.sort(cast(np.ndarray, interval.data)),
+            np.sort(self.previous_values[2:7]),
+        )
+
+    def test_data_is_copied(self) -> None:
+        # modifying the source series must not change the data or its statistics
+        ts = TimeSeriesData(
+            pd.DataFrame({"time": self.previous_seq, "value": self.previous_values})
+        )
+        interval = ChangePointInterval(self.previous_seq[0], self.previous_seq[9])
+        interval.data = ts
+        extended = ChangePointInterval(self.previous_seq[0], self.previous_seq[9])
+        extended.extend_data(ts)
+        ts.value.iloc[0] = 100.0
+        for iv in (interval, extended):
+            np.testing.assert_array_equal(
+                cast(np.ndarray, iv.data), self.previous_values[0:9]
+            )
+            self.assertAlmostEqual(iv.mean_val, np.mean(self.previous_values[0:9]))
+
 
 class MultivariateChangePointIntervalTest(TestCase):
     # test for multivariate time series
@@ -464,6 +550,32 @@ class UnivariatePercentageChangeTest(TestCase):
         self.assertTrue(np.isnan(self.perc_change_4.ci_lower))
         self.assertTrue(np.isnan(self.perc_change_4.ci_upper))
 
+    def test_empty_interval(self) -> None:
+        start = datetime.strptime("2020-03-01", "%Y-%m-%d")
+        empty_int = ChangePointInterval(start, start + timedelta(days=1))
+        empty_int.data = TimeSeriesData(
+            time=pd.Series([start + timedelta(days=2)]), value=pd.Series([1.0])
+        )
+        perc_change = PercentageChange(
+            current=self.perc_change_1.current, previous=empty_int
+        )
+        self.assertTrue(np.isnan(perc_change.score))
+        self.assertTrue(np.isnan(perc_change.p_value))
+        self.assertTrue(np.isnan(perc_change.perc_change_upper))
+        self.assertTrue(perc_change.stat_sig)
+
+    def test_data_set_after_construction(self) -> None:
+        # intervals that are still empty when PercentageChange is created
+        # must be picked up once their data is set
+        current, previous = self.perc_change_1.current, self.perc_change_1.previous
+        current_int = ChangePointInterval(current.start_time, current.end_time)
+        previous_int = ChangePointInterval(previous.start_time, previous.end_time)
+        perc_change = PercentageChange(current=current_int, previous=previous_int)
+        current_int.data = TimeSeriesData(cast(pd.DataFrame, current.data_df))
+        previous_int.data = TimeSeriesData(cast(pd.DataFrame, previous.data_df))
+        self.assertAlmostEqual(perc_change.score, self.perc_change_1.score)
+        self.assertAlmostEqual(perc_change.p_value, self.perc_change_1.p_value)
+
     # TODO delta method tests
 
 
@@ -650,6 +762,15 @@ class MultivariatePercentageChangeTest(TestCase):
             [True] * self.num_seq,
         )
 
+    def test_score_is_copy(self) -> None:
+        # modifying the returned scores must not change later results
+        score = cast(np.ndarray, self.perc_change_1.score)
+        expected = score.tolist()
+        score[:] = 0.0
+        self.assertListEqual(
+            cast(np.ndarray, self.perc_change_1.score).tolist(), expected
+        )
+
     def test_approx_ratio_estimate(self) -> None:
         # pyre-fixme[16]: Item `float` of `Union[float, ndarray]` has no attribute
         #  `__iter__`.
@@ -918,6 +1039,54 @@ class TestUnivariateAnomalyResponse(TestCase):
         with self.assertRaises(ValueError):
             self.response.extend(self.response_min_required, validate=False)
 
+    def test_inplace_update(self) -> None:
+        time = self.response.scores.time.iloc[5]
+        scores_before = self.response.scores.value.values.copy()
+        self.response.inplace_update(
+            time=time,
+            score=4.56,
+            ci_upper=4.56,
+            ci_lower=4.46,
+            pred=4.56,
+            anom_mag=4.56,
+            stat_sig=0.0,
+        )
+        scores_before[5] = 4.56
+        np.testing.assert_array_equal(self.response.scores.value.values, scores_before)
+        self.assertEqual(
+            cast(ConfidenceBand, self.response.confidence_band).lower.value.values[5],
+            4.46,
+        )
+
+    def test_inplace_update_after_replacing_scores(self) -> None:
+        # the time lookup must follow the scores when they are reassigned
+        response = self.response_min_required
+        response.inplace_update(
+            time=response.scores.time.iloc[5],
+            score=4.56,
+            ci_upper=4.56,
+            ci_lower=4.46,
+            pred=4.56,
+            anom_mag=4.56,
+            stat_sig=0.0,
+        )
+        shifted_time = response.scores.time + pd.Timedelta(days=3)
+        response.scores = TimeSeriesData(time=shifted_time, value=response.scores.value)
+        response.anomaly_magnitude_ts = TimeSeriesData(
+            time=shifted_time, value=response.anomaly_magnitude_ts.value
+        )
+        response.inplace_update(
+            time=shifted_time.iloc[5],
+            score=7.89,
+            ci_upper=7.89,
+            ci_lower=7.79,
+            pred=7.89,
+            anom_mag=7.89,
+            stat_sig=0.0,
+        )
+        self.assertEqual(response.scores.value.values[5], 7.89)
+        self.assertEqual(response.anomaly_magnitude_ts.value.values[5], 7.89)
+
 
 class TestMultivariateAnomalyResponse(TestCase):
     # test anomaly response for multivariate time series
@@ -1209,3 +1378,52 @@ class TestMultivariateAnomalyResponse(TestCase):
     def test_extend_mismatch(self) -> None:
         with self.assertRaises(ValueError):
             self.response.extend(self.response_min_required, validate=False)
+
+    def test_inplace_update(self) -> None:
+        time = self.response.scores.time.iloc[5]
+        new_val = 4.56 * np.ones(self.num_seq)
+        self.response.inplace_update(
+            time=time,
+            score=new_val,
+            ci_upper=new_val,
+            ci_lower=new_val - 0.1,
+            pred=new_val,
+            anom_mag=new_val,
+            stat_sig=np.zeros(self.num_seq),
+        )
+        np.testing.assert_array_equal(self.response.scores.value.values[5], new_val)
+        np.testing.assert_array_equal(
+            cast(TimeSeriesData, self.response.stat_sig_ts).value.values[5],
+            np.zeros(self.num_seq),
+        )
+
+    def test_update_wrong_shape(self) -> None:
+        # a bad value must be rejected before any of the components are shifted
+        new_date = self.response.scores.time.iloc[-1] + timedelta(days=1)
+        scores_before = self.response.scores.value.values.copy()
+        with self.assertRaises(ValueError):
+            self.response.update(
+                time=new_date,
+                score=np.zeros(self.num_seq),
+                ci_upper=np.zeros(self.num_seq),
+                ci_lower=np.zeros(self.num_seq),
+                pred=np.zeros(self.num_seq - 1),
+                anom_mag=np.zeros(self.num_seq),
+                stat_sig=np.zeros(self.num_seq),
+            )
+        np.testing.assert_array_equal(self.response.scores.value.values, scores_before)
+
+    def test_update_ignores_missing_components(self) -> None:
+        # values for components that are None aren't checked
+        new_date = self.response_min_required.scores.time.iloc[-1] + timedelta(days=1)
+        self.response_min_required.update(
+            time=new_date,
+            score=np.ones(self.num_seq),
+            ci_upper=0.0,
+            ci_lower=0.0,
+            pred=0.0,
+            anom_mag=np.ones(self.num_seq),
+            stat_sig=0.0,
+        )
+        self.assertEqual(self.response_min_required.scores.time.iloc[-1], new_date)
+        self.assertEqual(len(self.response_min_required.scores), self.N)